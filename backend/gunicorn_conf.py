@@ -0,0 +1,35 @@
+# gunicorn_conf.py
+# --- Production server configuration ---
+# Run with: gunicorn -c gunicorn_conf.py main:app
+#
+# Each worker runs its own Uvicorn event loop, so throughput scales with
+# the number of cores. `preload_app` loads the module once in the master
+# so the product catalog and code pages are shared copy-on-write.
+#
+# NOTE: the in-memory `DB` dict is per-process, so the default stays at a
+# single worker. Set WEB_CONCURRENCY above 1 only once cart/order state
+# lives in an external store; REDIS_URL already covers cross-worker
+# discount broadcasts, but carts, orders and discount codes would still
+# diverge between workers.
+import os
+
+bind = "0.0.0.0:8000"
+workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+
+# Deeper TCP accept queue so connection bursts queue instead of being
+# refused. Access logging stays off (the default): the per-request logger
+# call is measurable overhead for handlers this small.
+backlog = 4096
+accesslog = None
+
+def on_starting(server):
+    # Every websocket holds a file descriptor, and the usual soft limit of
+    # 1024 silently refuses new connections at modest fanout. Raise the
+    # soft limit to the hard limit; workers inherit it. Raising the hard
+    # limit itself needs external config (see README).
+    import resource
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
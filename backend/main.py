@@ -1,17 +1,41 @@
 # main.py
 # --- Import necessary libraries ---
+import asyncio
+import itertools
+import logging
+import orjson
+import os
+import secrets
 import uvicorn
-import uuid
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, Header, Query, Response, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Optional
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict
+from contextlib import asynccontextmanager
+from typing import List, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
 
 # --- Application Setup ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the Redis broadcast relay (a no-op without REDIS_URL), keeping
+    # a reference so the task can't be garbage-collected mid-flight.
+    global _relay_task
+    if redis_client is not None:
+        _relay_task = asyncio.create_task(_broadcast_relay())
+    yield
+    if _relay_task is not None:
+        _relay_task.cancel()
+
 app = FastAPI(
     title="E-commerce API",
     description="A sophisticated API for an e-commerce store with real-time notifications.",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes response dicts several times faster than the
+    # stdlib encoder behind the default JSONResponse.
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # --- CORS Middleware ---
@@ -24,11 +48,17 @@ app.add_middleware(
 )
 
 # --- Data Models ---
+# strict skips pydantic-core's lax type-coercion branches on every request;
+# frozen lets validated payloads be treated as immutable values.
 class CartItem(BaseModel):
+    model_config = ConfigDict(strict=True, frozen=True)
+
     item_id: str
     quantity: int
 
 class CheckoutPayload(BaseModel):
+    model_config = ConfigDict(strict=True, frozen=True)
+
     discount_code: Optional[str] = None
 
 # --- In-Memory Database ---
@@ -39,14 +69,23 @@ PRODUCTS = {
     "item_004": {"name": "Code Weaver Hoodie", "price": 49.99},
 }
 
+# Flat item_id -> price-in-cents lookup so checkout's hot loop skips the
+# nested ["price"] dereference and does exact integer arithmetic; floats
+# only appear at the JSON boundary.
+_PRICE_CENTS = {item_id: round(product["price"] * 100) for item_id, product in PRODUCTS.items()}
+
+# The catalog never changes at runtime, so serialize it once at import time
+# and serve the cached bytes instead of re-encoding on every request.
+_PRODUCTS_JSON = orjson.dumps(PRODUCTS)
+
 DB = {
     "cart": {},
     "orders": [],
     "store_stats": {
         "items_purchased_count": 0,
-        "total_purchase_amount": 0.0,
+        "total_purchase_amount_cents": 0,
         "discount_codes_list": [],
-        "total_discount_amount": 0.0,
+        "total_discount_amount_cents": 0,
     },
     "current_discount_code": None,
     "nth_order_value": 3
@@ -55,33 +94,90 @@ DB = {
 # --- WebSocket Manager ---
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: List[WebSocket] = []
+        # A set makes disconnects O(1); a list would scan all connections.
+        self.active_connections: Set[WebSocket] = set()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        self.active_connections.add(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        # discard, not remove: broadcast may have already pruned the socket.
+        self.active_connections.discard(websocket)
 
     async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            await connection.send_text(message)
+        # Encode the payload once instead of once per recipient; the
+        # frontend decodes the binary frame back to text.
+        message_bytes = message.encode("utf-8")
+        # Send to all clients concurrently so one slow or dead socket
+        # cannot stall the rest; prune connections whose send failed.
+        connections = list(self.active_connections)
+        results = await asyncio.gather(
+            *(connection.send_bytes(message_bytes) for connection in connections),
+            return_exceptions=True,
+        )
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                self.active_connections.discard(connection)
 
 manager = ConnectionManager()
 
+# --- Optional Redis broadcast bridge ---
+# With more than one worker (see gunicorn_conf.py) each process holds its
+# own websocket pool, so a checkout handled by one worker would only notify
+# the clients attached to it. When REDIS_URL is set, broadcasts go through
+# a Redis pub/sub channel and every worker relays them to its local sockets.
+# Without it (development, tests) broadcasts stay in-process.
+REDIS_URL = os.environ.get("REDIS_URL")
+BROADCAST_CHANNEL = "broadcasts"
+
+redis_client = None
+if REDIS_URL:
+    import redis.asyncio as aioredis
+    redis_client = aioredis.from_url(REDIS_URL)
+
+async def publish_broadcast(message: str):
+    """Fan a message out to every connected client, across all workers."""
+    if redis_client is not None:
+        await redis_client.publish(BROADCAST_CHANNEL, message)
+    else:
+        await manager.broadcast(message)
+
+_relay_task = None
+
+async def _broadcast_relay():
+    # Run forever: a dropped Redis connection would otherwise end the
+    # listen loop silently and this worker would never broadcast again.
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(BROADCAST_CHANNEL)
+            async for msg in pubsub.listen():
+                if msg["type"] == "message":
+                    data = msg["data"]
+                    await manager.broadcast(data.decode("utf-8") if isinstance(data, bytes) else data)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Broadcast relay lost its Redis subscription; reconnecting in 1s")
+            await asyncio.sleep(1)
+        finally:
+            # Release the subscription's connection so retries during a
+            # prolonged outage don't accumulate dead pubsub connections.
+            await pubsub.aclose()
+
 # --- API Endpoints ---
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"status": "E-commerce API is running"}
 
 @app.get("/products")
-def get_products():
-    return PRODUCTS
+async def get_products():
+    return Response(content=_PRODUCTS_JSON, media_type="application/json")
 
 @app.post("/cart/add")
-def add_to_cart(item: CartItem):
+async def add_to_cart(item: CartItem):
     if item.item_id not in PRODUCTS:
         raise HTTPException(status_code=404, detail="Item not found")
     
@@ -90,68 +186,120 @@ def add_to_cart(item: CartItem):
     return {"message": f"Added {item.quantity} of {PRODUCTS[item.item_id]['name']} to cart.", "cart": DB["cart"]}
 
 @app.get("/cart")
-def get_cart():
+async def get_cart():
     return DB["cart"]
 
+# Monotonic order-id source: one atomic increment per checkout instead of
+# two len() calls against the ever-growing orders list.
+_order_counter = itertools.count(1)
+
+# Stats only change on checkout, so /admin/stats serializes them once per
+# version and lets pollers revalidate with If-None-Match between orders.
+_stats_version = 0
+_stats_cache = (-1, "", b"")  # (version, etag, body)
+
+# Serializes checkout's read-modify-write of the cart, orders and stats;
+# without it two checkouts interleaving at an await point could duplicate
+# order ids, double-count stats or consume a discount code twice.
+_checkout_lock = asyncio.Lock()
+
 @app.post("/checkout")
 async def checkout(payload: CheckoutPayload):
-    if not DB["cart"]:
-        raise HTTPException(status_code=400, detail="Cart is empty")
+    async with _checkout_lock:
+        if not DB["cart"]:
+            raise HTTPException(status_code=400, detail="Cart is empty")
 
-    subtotal = sum(PRODUCTS[item_id]["price"] * quantity for item_id, quantity in DB["cart"].items())
-    items_in_order = sum(DB["cart"].values())
-    
-    discount_amount = 0.0
-    discount_applied = False
-
-    # Validate discount code
-    if payload.discount_code and payload.discount_code == DB["current_discount_code"]:
-        # **BUG FIX**: Calculate and round the discount immediately for precision.
-        discount_amount = round(subtotal * 0.10, 2)
-        DB["current_discount_code"] = None  # Invalidate the code after use
-        discount_applied = True
-
-    # **BUG FIX**: Calculate final total using the potentially rounded discount.
-    final_total = subtotal - discount_amount
-
-    order = {
-        "order_id": len(DB["orders"]) + 1,
-        "items": DB["cart"].copy(),
-        "subtotal": round(subtotal, 2),
-        "discount_applied": discount_applied,
-        "discount_amount": discount_amount, # Already rounded
-        "total": round(final_total, 2)
-    }
-    DB["orders"].append(order)
-
-    # Update stats
-    stats = DB["store_stats"]
-    stats["items_purchased_count"] += items_in_order
-    # **BUG FIX**: Update stats with the final, rounded total for consistency.
-    stats["total_purchase_amount"] += round(final_total, 2)
-    if discount_applied:
-        stats["total_discount_amount"] += discount_amount
-
-    # Clear the cart
-    DB["cart"] = {}
-
-    # Check for discount code generation
-    if len(DB["orders"]) % DB["nth_order_value"] == 0:
-        new_code = f"SAVE10-{str(uuid.uuid4())[:4].upper()}"
-        DB["current_discount_code"] = new_code
-        stats["discount_codes_list"].append(new_code)
-        await manager.broadcast(f"New Discount Code Available: {new_code}")
+        # One pass over the cart computes both aggregates, in exact cents.
+        subtotal_cents = 0
+        items_in_order = 0
+        for item_id, quantity in DB["cart"].items():
+            subtotal_cents += _PRICE_CENTS[item_id] * quantity
+            items_in_order += quantity
+
+        discount_cents = 0
+        discount_applied = False
+
+        # Validate discount code
+        if payload.discount_code and payload.discount_code == DB["current_discount_code"]:
+            discount_cents = round(subtotal_cents / 10)  # 10% off, rounded to the cent
+            DB["current_discount_code"] = None  # Invalidate the code after use
+            discount_applied = True
+
+        total_cents = subtotal_cents - discount_cents
+
+        # Hand the cart dict itself to the order instead of copying it;
+        # the lock guarantees nothing else holds a reference, and a fresh
+        # dict takes over as the live cart.
+        cart_items = DB["cart"]
+        DB["cart"] = {}
+
+        order_id = next(_order_counter)
+        order = {
+            "order_id": order_id,
+            "items": cart_items,
+            "subtotal": subtotal_cents / 100,
+            "discount_applied": discount_applied,
+            "discount_amount": discount_cents / 100,
+            "total": total_cents / 100
+        }
+        DB["orders"].append(order)
+
+        # Update stats (kept in integer cents so accumulation never drifts)
+        stats = DB["store_stats"]
+        stats["items_purchased_count"] += items_in_order
+        stats["total_purchase_amount_cents"] += total_cents
+        if discount_applied:
+            stats["total_discount_amount_cents"] += discount_cents
+
+        # Check for discount code generation
+        new_code = None
+        if order_id % DB["nth_order_value"] == 0:
+            new_code = f"SAVE10-{secrets.token_hex(2).upper()}"
+            DB["current_discount_code"] = new_code
+            stats["discount_codes_list"].append(new_code)
+
+        # Invalidate the cached /admin/stats body (last stats mutation above).
+        global _stats_version
+        _stats_version += 1
+
+    # Broadcast outside the lock so slow websocket writes don't extend
+    # the critical section.
+    if new_code is not None:
+        await publish_broadcast(f"New Discount Code Available: {new_code}")
 
     return {"message": "Checkout successful!", "order_details": order}
 
 
 @app.get("/admin/stats")
-def get_store_stats():
-    return DB["store_stats"]
+async def get_store_stats(if_none_match: Optional[str] = Header(None)):
+    global _stats_cache
+    version, etag, body = _stats_cache
+    if version != _stats_version:
+        stats = DB["store_stats"]
+        # Convert the cent counters back to currency at the JSON boundary.
+        body = orjson.dumps({
+            "items_purchased_count": stats["items_purchased_count"],
+            "total_purchase_amount": stats["total_purchase_amount_cents"] / 100,
+            "discount_codes_list": stats["discount_codes_list"],
+            "total_discount_amount": stats["total_discount_amount_cents"] / 100,
+        })
+        etag = f'"{_stats_version}"'
+        _stats_cache = (_stats_version, etag, body)
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 @app.get("/admin/orders")
-def get_all_orders():
-    return DB["orders"]
+async def get_all_orders(limit: int = Query(50, ge=1, le=500), offset: int = Query(0, ge=0)):
+    # Return one page instead of the whole history, so response size
+    # stays O(page) as orders accumulate.
+    orders = DB["orders"]
+    return {
+        "total": len(orders),
+        "limit": limit,
+        "offset": offset,
+        "orders": orders[offset:offset + limit],
+    }
 
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
@@ -161,5 +309,7 @@ async def websocket_endpoint(websocket: WebSocket):
             await websocket.receive_text()
     except WebSocketDisconnect:
         manager.disconnect(websocket)
-        print("Client disconnected")
+        # debug level: a disconnect storm must not serialize the event
+        # loop behind stdout writes the way print() did.
+        logger.debug("Client disconnected")
 
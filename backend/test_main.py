@@ -1,6 +1,10 @@
 # test_main.py
+import itertools
+
 import pytest
 from fastapi.testclient import TestClient
+
+import main
 from main import app, DB, PRODUCTS
 
 # --- Test Setup ---
@@ -13,11 +17,14 @@ def reset_database():
     DB["orders"] = []
     DB["store_stats"] = {
         "items_purchased_count": 0,
-        "total_purchase_amount": 0.0,
+        "total_purchase_amount_cents": 0,
         "discount_codes_list": [],
-        "total_discount_amount": 0.0,
+        "total_discount_amount_cents": 0,
     }
     DB["current_discount_code"] = None
+    main._order_counter = itertools.count(1)
+    main._stats_version = 0
+    main._stats_cache = (-1, "", b"")
     yield
 
 # --- Test Cases ---
@@ -65,7 +72,7 @@ def test_successful_checkout_no_discount():
     
     stats = DB["store_stats"]
     assert stats["items_purchased_count"] == 2
-    assert stats["total_purchase_amount"] == 39.98
+    assert stats["total_purchase_amount_cents"] == 3998
     assert len(DB["orders"]) == 1
 
 def test_discount_generation_and_usage():
@@ -115,6 +122,37 @@ def test_checkout_with_invalid_discount_code():
     
     assert DB["current_discount_code"] == "VALID-CODE"
 
+def test_admin_stats_etag_caching():
+    client.post("/cart/add", json={"item_id": "item_001", "quantity": 1})
+    client.post("/checkout", json={})
+
+    response = client.get("/admin/stats")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    # Unchanged stats revalidate instead of re-sending the body.
+    cached = client.get("/admin/stats", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+    # Another checkout invalidates the cached version.
+    client.post("/cart/add", json={"item_id": "item_002", "quantity": 1})
+    client.post("/checkout", json={})
+    refreshed = client.get("/admin/stats", headers={"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+
+def test_admin_orders_pagination():
+    for _ in range(5):
+        client.post("/cart/add", json={"item_id": "item_001", "quantity": 1})
+        client.post("/checkout", json={})
+
+    response = client.get("/admin/orders", params={"limit": 2, "offset": 1})
+    assert response.status_code == 200
+    page = response.json()
+
+    assert page["total"] == 5
+    assert [order["order_id"] for order in page["orders"]] == [2, 3]
+
 def test_admin_stats_endpoint():
     client.post("/cart/add", json={"item_id": "item_001", "quantity": 1}) # 19.99
     client.post("/checkout", json={})
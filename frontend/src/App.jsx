@@ -114,7 +114,7 @@ const Cart = ({ cart, products, onCheckout, discountCode, setDiscountCode, lastO
   );
 };
 
-const AdminPanel = ({ stats, orders, loading }) => (
+const AdminPanel = ({ stats, orderTotal, loading }) => (
   <div className={`${styles.card} ${styles.adminPanel}`}>
     <h2 className={styles.cardTitle}>Admin Panel</h2>
     {loading ? <Spinner /> : (
@@ -134,7 +134,7 @@ const AdminPanel = ({ stats, orders, loading }) => (
           </div>
           <div className={styles.statCard}>
             <p className={styles.statLabel}>Total Orders</p>
-            <p className={styles.statValue}>{orders.length || 0}</p>
+            <p className={styles.statValue}>{orderTotal || 0}</p>
           </div>
         </div>
         <div>
@@ -161,7 +161,7 @@ export default function App() {
   const [products, setProducts] = useState({});
   const [cart, setCart] = useState({});
   const [stats, setStats] = useState({});
-  const [orders, setOrders] = useState([]);
+  const [orderTotal, setOrderTotal] = useState(0);
   const [discountCode, setDiscountCode] = useState('');
   const [lastOrder, setLastOrder] = useState(null);
   const [toast, setToast] = useState(null);
@@ -182,7 +182,7 @@ export default function App() {
         setProducts(await productsRes.json());
         setCart(await cartRes.json());
         setStats(await statsRes.json());
-        setOrders(await ordersRes.json());
+        setOrderTotal((await ordersRes.json()).total); // total spans all pages, not just the first
       } catch (error) {
         setToast({ message: 'Failed to fetch initial data.', type: 'error' });
       } finally {
@@ -192,9 +192,11 @@ export default function App() {
     fetchData();
 
     ws.current = new WebSocket(WEBSOCKET_URL);
+    ws.current.binaryType = 'arraybuffer'; // broadcasts arrive as UTF-8 binary frames
     ws.current.onmessage = (event) => {
-      setToast({ message: event.data, type: 'info' });
-      fetchAdminStats(); 
+      const message = typeof event.data === 'string' ? event.data : new TextDecoder().decode(event.data);
+      setToast({ message, type: 'info' });
+      fetchAdminStats();
     };
 
     return () => ws.current?.close();
@@ -208,7 +210,7 @@ export default function App() {
         fetch(`${API_URL}/admin/orders`),
       ]);
       setStats(await statsRes.json());
-      setOrders(await ordersRes.json());
+      setOrderTotal((await ordersRes.json()).total);
     } catch (error) {
        setToast({ message: 'Failed to update admin stats.', type: 'error' });
     } finally {
@@ -266,7 +268,7 @@ export default function App() {
         <Cart cart={cart} products={products} onCheckout={handleCheckout} discountCode={discountCode} setDiscountCode={setDiscountCode} lastOrder={lastOrder} />
       </main>
       
-      <AdminPanel stats={stats} orders={orders} loading={loading.stats} />
+      <AdminPanel stats={stats} orderTotal={orderTotal} loading={loading.stats} />
     </div>
   );
 }